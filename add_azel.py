@@ -1,23 +1,47 @@
 import os
+import numpy as np
 import pandas as pd
-from skyfield.api import Loader, Topos, wgs84
 from datetime import datetime, timedelta
-import requests
+
+# skyfield and requests are imported on first use; the timescale and the TLEs are
+# loaded (and the TLE file downloaded) only when a calculation needs them
 
 OBSERVER_LAT = 40.70
 OBSERVER_LON = -8.35
 OBSERVER_ELEVATION = 300
 
 
-load = Loader('.')
-ts = load.timescale()
+# Directory where skyfield keeps its data files
+SKYFIELD_DATA_DIRECTORY = '.'
+
+_load = None
+_ts = None
+_satellites = None
 
 
 TLE_URL = 'https://celestrak.org/NORAD/elements/weather.txt'
 TLE_FILE_PATH = 'weather.txt'
 
 
+def get_loader():
+    global _load
+    if _load is None:
+        from skyfield.api import Loader
+        _load = Loader(SKYFIELD_DATA_DIRECTORY)
+    return _load
+
+
+def get_timescale():
+    # builtin=True używa danych UT1/delta T dołączonych do skyfield, bez pobierania z sieci
+    global _ts
+    if _ts is None:
+        _ts = get_loader().timescale(builtin=True)
+    return _ts
+
+
 def download_tle_file(url, file_path):
+    import requests
+
     response = requests.get(url)
     response.raise_for_status()
     with open(file_path, 'wb') as file:
@@ -31,16 +55,77 @@ def is_file_older_than_days(file_path, days=3):
     return datetime.now() - file_mod_time > timedelta(days=days)
 
 
-if is_file_older_than_days(TLE_FILE_PATH, days=3):
-    download_tle_file(TLE_URL, TLE_FILE_PATH)
+def get_satellites():
+    global _satellites
+    if _satellites is None:
+        if is_file_older_than_days(TLE_FILE_PATH, days=3):
+            download_tle_file(TLE_URL, TLE_FILE_PATH)
+        _satellites = get_loader().tle_file(TLE_FILE_PATH)
+    return _satellites
+
+
+# Function to get the name of a satellite in the TLE file from its name in the satdump logs
+def tle_satellite_name(satellite_name):
+    # Zastąpienie ostatniego występującego "-" spacją
+    last_dash_index = satellite_name.rfind('-')
+    if last_dash_index != -1:
+        satellite_name = satellite_name[:last_dash_index] + ' ' + satellite_name[last_dash_index + 1:]
+    return satellite_name
 
 
-satellites = load.tle_file(TLE_FILE_PATH)
+# Function to get the position keys of the rows of a DataFrame: (TLE satellite name, time to the second)
+# Rows without satellite name or timestamp get None
+def position_keys(df):
+    keys = []
+    for index, satellite_name, timestamp in zip(df.index, df['satellite'], df['Timestamp']):
+        try:
+            if isinstance(satellite_name, str) and pd.notna(timestamp):
+                keys.append((tle_satellite_name(satellite_name), timestamp.year, timestamp.month, timestamp.day, timestamp.hour, timestamp.minute, timestamp.second))
+            else:
+                keys.append(None)
+        except Exception as e:
+            print(f"Error reading satellite and timestamp of row {index}: {e}")
+            keys.append(None)
+    return keys
+
+
+# Function to convert position keys to one skyfield Time array
+def keys_to_time(keys):
+    _, years, months, days, hours, minutes, seconds = (np.array(column) for column in zip(*keys))
+    return get_timescale().utc(years, months, days, hours, minutes, seconds)
+
+
+# Function to calculate the geocentric positions of the satellites at every second in the DataFrames
+# Returns {(TLE satellite name, time to the second): ((x, y, z) in km, lat, lon)} with plain floats,
+# so the positions can be shared between stations without keeping skyfield objects around
+def calculate_positions(dfs, satellites):
+    from skyfield.api import wgs84
+
+    satellites_by_name = {}
+    for satellite in satellites:
+        satellites_by_name.setdefault(satellite.name, satellite)
+
+    keys_by_satellite = {}
+    for df in dfs:
+        for key in position_keys(df):
+            if key is not None and key[0] in satellites_by_name:
+                keys_by_satellite.setdefault(key[0], set()).add(key)
+
+    positions = {}
+    for satellite_name, keys in keys_by_satellite.items():
+        keys = sorted(keys)
+        geocentric = satellites_by_name[satellite_name].at(keys_to_time(keys))
+        lat, lon = wgs84.latlon_of(geocentric)
+        for key, vector, satellite_lat, satellite_lon in zip(keys, geocentric.position.km.T.tolist(), lat.degrees.tolist(), lon.degrees.tolist()):
+            positions[key] = (tuple(vector), satellite_lat, satellite_lon)
+    return positions
 
 
 def calculate_azimuth_elevation(satellite, observer_lat, observer_lon, observer_elevation, timestamp):
+    from skyfield.api import Topos, wgs84
+
     observer_location = Topos(latitude_degrees=observer_lat, longitude_degrees=observer_lon, elevation_m=observer_elevation)
-    time = ts.utc(timestamp.year, timestamp.month, timestamp.day, timestamp.hour, timestamp.minute, timestamp.second)
+    time = get_timescale().utc(timestamp.year, timestamp.month, timestamp.day, timestamp.hour, timestamp.minute, timestamp.second)
     difference = satellite - observer_location
     topocentric = difference.at(time)
     alt, az, distance = topocentric.altaz()
@@ -48,41 +133,40 @@ def calculate_azimuth_elevation(satellite, observer_lat, observer_lon, observer_
     return az.degrees, alt.degrees, distance.km, lat.degrees, lon.degrees
 
 
-def add_azimuth_elevation_distance(df, satellites):
+# positions (see calculate_positions) can be computed once for several stations; otherwise they are computed for df
+def add_azimuth_elevation_distance(df, satellites, observer_lat=OBSERVER_LAT, observer_lon=OBSERVER_LON, observer_elevation=OBSERVER_ELEVATION, positions=None):
+    from skyfield.api import Topos
+    from skyfield.constants import AU_KM
+    from skyfield.positionlib import ICRF
 
+    if positions is None:
+        positions = calculate_positions([df], satellites)
 
-    results = []
-    for _, row in df.iterrows():
-        try:
-            timestamp = row['Timestamp']
-            satellite_name = row['satellite']
-            # Zastąpienie ostatniego występującego "-" spacją
-            last_dash_index = satellite_name.rfind('-')
-            if last_dash_index != -1:
-                satellite_name = satellite_name[:last_dash_index] + ' ' + satellite_name[last_dash_index + 1:]
-            satellite = next((sat for sat in satellites if sat.name == satellite_name), None)
-
-            if satellite is not None and pd.notna(timestamp):
-                azimuth, elevation, distance_km, lat, lon = calculate_azimuth_elevation(satellite, OBSERVER_LAT, OBSERVER_LON, OBSERVER_ELEVATION, timestamp)
-            else:
-                azimuth = None
-                elevation = None
-                distance_km = None
-                lat = None
-                lon = None
+    results = {column: [None] * len(df) for column in ('Azimuth', 'Elevation', 'Distance', 'lat', 'lon')}
+    rows = [(row, key) for row, key in enumerate(position_keys(df)) if key in positions]
+    if rows:
+        # Topocentric positions of all rows at once, from the shared geocentric positions
+        keys = [key for _, key in rows]
+        time = keys_to_time(keys)
+        observer_location = Topos(latitude_degrees=observer_lat, longitude_degrees=observer_lon, elevation_m=observer_elevation)
+        satellite_au = np.array([positions[key][0] for key in keys]).T / AU_KM
+        topocentric = ICRF(satellite_au - observer_location.at(time).position.au, t=time, center=observer_location)
+        alt, az, distance = topocentric.altaz()
 
-            results.append({'Azimuth': azimuth, 'Elevation': elevation, 'Distance': distance_km, 'lat': lat, 'lon': lon})
-        except Exception as e:
-            print(f"Error calculating azimuth and elevation for row {row}: {e}")
-            results.append({'Azimuth': None, 'Elevation': None, 'Distance': None, 'lat': None, 'lon': None})
+        for (row, key), azimuth, elevation, distance_km in zip(rows, az.degrees.tolist(), alt.degrees.tolist(), distance.km.tolist()):
+            results['Azimuth'][row] = azimuth
+            results['Elevation'][row] = elevation
+            results['Distance'][row] = distance_km
+            results['lat'][row] = positions[key][1]
+            results['lon'][row] = positions[key][2]
 
-    return df.assign(**pd.DataFrame(results))
+    return df.assign(**pd.DataFrame(results, index=df.index))
 
 # Główna funkcja
 def main():
     df = pd.read_excel('parsed_log_data.xlsx')
 
-    enriched_df = add_azimuth_elevation_distance(df, satellites)
+    enriched_df = add_azimuth_elevation_distance(df, get_satellites())
     enriched_df.to_excel('final_processed_log_data_enriched.xlsx', index=False)
 
 if __name__ == '__main__':
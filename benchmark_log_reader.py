@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+from log_reader import TEXT_MARKERS, iter_log_lines
+
+# Synthetic logs measured when no log file is given: name -> (lines, one marker line every n lines)
+SYNTHETIC_LOGS = {
+    'sparse': (2_000_000, 500_000),
+    'dense': (2_000_000, 3),
+}
+
+NOISE_LINE = '[10:00:00 - 01/01/2024] (D) Deframer state : 2, buffer 8192 samples, frequency offset 1234.5 Hz\n'
+MARKER_LINE = '[10:00:00 - 01/01/2024] (I) Progress SNR : 5.10dB, Peak SNR: 7.20dB, BER : 0.001\n'
+
+# Function to write a synthetic satdump log
+def write_synthetic_log(path, lines, marker_every):
+    with open(path, 'w') as f:
+        for i in range(lines):
+            f.write(MARKER_LINE if i % marker_every == 0 else NOISE_LINE)
+
+# Function to read the marker lines the way process_log_files did before log_reader.py
+def read_line_by_line(file_path):
+    progress, start, los, folder = TEXT_MARKERS
+    with open(file_path, 'r') as f:
+        return [line for line in f if start in line or los in line or progress in line or folder in line]
+
+# Function to measure the wall time of reading a log
+def time_reader(reader, file_path, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lines = len(list(reader(file_path)))
+        timings.append(time.perf_counter() - start)
+    return timings, lines
+
+# Main function
+# Prints min and median time of the line-by-line loop and of log_reader.iter_log_lines for every log
+def main():
+    parser = argparse.ArgumentParser(description='Compare log_reader.py with a line-by-line read of the logs.')
+    parser.add_argument('logs', nargs='*', help='Log files to read (synthetic logs are generated if none is given)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        logs = {os.path.basename(path): path for path in args.logs}
+        if not logs:
+            for name, (lines, marker_every) in SYNTHETIC_LOGS.items():
+                logs[name] = os.path.join(directory, f'{name}.log')
+                write_synthetic_log(logs[name], lines, marker_every)
+
+        print(f"{'log':<20}{'reader':<16}{'lines':>10}{'min [s]':>10}{'median [s]':>12}")
+        for name, path in logs.items():
+            for reader_name, reader in (('line by line', read_line_by_line), ('log_reader', iter_log_lines)):
+                timings, lines = time_reader(reader, path, args.repeat)
+                print(f"{name:<20}{reader_name:<16}{lines:>10}{min(timings):>10.3f}{statistics.median(timings):>12.3f}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+# Startup budget for the quick paths (imports, --help, summary-only run), in seconds
+STARTUP_BUDGET = 1.0
+
+# Commands measured, each one in a fresh interpreter
+COMMANDS = {
+    'import log_parser': [sys.executable, '-c', 'import log_parser'],
+    'import add_azel': [sys.executable, '-c', 'import add_azel'],
+    'import generate_summary': [sys.executable, '-c', 'import generate_summary'],
+    'import combined_coverage': [sys.executable, '-c', 'import combined_coverage'],
+    'import stations': [sys.executable, '-c', 'import stations'],
+    'import render_server': [sys.executable, '-c', 'import render_server'],
+    'generate_summary.py --help': [sys.executable, 'generate_summary.py', '--help'],
+}
+
+# The summary-only run needs the output of add_azel.py
+SUMMARY_ONLY_COMMAND = [sys.executable, 'generate_summary.py', '--summary-only']
+SUMMARY_ONLY_INPUT = 'final_processed_log_data_enriched.xlsx'
+
+# Function to measure the wall time of a command
+def time_command(command, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+# Main function
+# Prints min and median startup time of every command and returns 1 if one of them is over budget
+def main():
+    parser = argparse.ArgumentParser(description='Measure startup time of the scripts.')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    commands = dict(COMMANDS)
+    if os.path.exists(SUMMARY_ONLY_INPUT):
+        commands['generate_summary.py --summary-only'] = SUMMARY_ONLY_COMMAND
+
+    over_budget = False
+    print(f"{'command':<40}{'min [s]':>10}{'median [s]':>12}")
+    for name, command in commands.items():
+        timings = time_command(command, args.repeat)
+        median = statistics.median(timings)
+        over_budget = over_budget or median > STARTUP_BUDGET
+        print(f"{name:<40}{min(timings):>10.3f}{median:>12.3f}{'  OVER BUDGET' if median > STARTUP_BUDGET else ''}")
+
+    return 1 if over_budget else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,12 @@
 import os
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
-from jinja2 import Template
-from folium.plugins import HeatMap
-import folium
-from PIL import Image  # Dodano import dla Image z PIL
+
+# matplotlib, cartopy, folium and PIL are imported inside the functions that use them
 
 # Helper function to create a thumbnail
 def create_thumbnail(image_path, thumb_path, size=(200, 200)):
     if not os.path.exists(thumb_path):  # Only create thumbnail if it doesn't exist
+        from PIL import Image
         try:
             img = Image.open(image_path)
             img.thumbnail(size)
@@ -22,6 +16,9 @@ def create_thumbnail(image_path, thumb_path, size=(200, 200)):
 
 # Generate Folium Heatmap
 def generate_folium_heatmap(df, output_path):
+    import folium
+    from folium.plugins import HeatMap
+
     df = df[df['SNR'].astype(float) != 0]  # Filter out rows where SNR is 0
     heatmap_data = df[['lat', 'lon', 'SNR']].dropna().values.tolist()
 
@@ -37,6 +34,10 @@ def generate_cartopy_heatmap(df, output_path):
         print("No valid data points. Skipping Cartopy heatmap.")
         return
 
+    import matplotlib.pyplot as plt
+    import cartopy.crs as ccrs
+    import cartopy.feature as cfeature
+
     plt.figure(figsize=(20, 12))
     ax = plt.axes(projection=ccrs.PlateCarree())
     ax.add_feature(cfeature.LAND)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# Columns reduced for the SNR/elevation plots
+TIME_SERIES_COLUMNS = ('SNR', 'Peak_SNR', 'BER', 'Elevation')
+
+# Width of the SNR and elevation plot in pixels (16 inch at 300 dpi)
+PLOT_WIDTH_PIXELS = 16 * 300
+
+# Function to select points with Largest-Triangle-Three-Buckets
+# Returns the indices of the kept points; x must be sorted
+def lttb_indices(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    # The first and last points are kept, the others are split into threshold - 2 buckets
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+
+        # Average point of the next bucket is the third vertex of the triangle
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return indices
+
+# Function to select the minimum and maximum of each bucket
+# Returns the indices of the kept points in their original order; x must be sorted
+def minmax_indices(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    indices = []
+    for bucket in np.array_split(np.arange(n), threshold // 2):
+        indices.append(bucket[np.argmin(y[bucket])])
+        indices.append(bucket[np.argmax(y[bucket])])
+    return np.unique(indices)
+
+DOWNSAMPLE_METHODS = {
+    'lttb': lttb_indices,
+    'minmax': minmax_indices,
+}
+
+# Function to reduce one column of a pass to at most threshold points
+# Returns a DataFrame with Timestamp and the column, without missing values
+def downsample_series(df, column, threshold=PLOT_WIDTH_PIXELS, method='lttb'):
+    series = pd.DataFrame({
+        'Timestamp': pd.to_datetime(df['Timestamp']),
+        column: pd.to_numeric(df[column], errors='coerce'),
+    }).dropna().sort_values('Timestamp')
+
+    x = (series['Timestamp'] - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+    y = series[column].to_numpy(dtype=float)
+    indices = DOWNSAMPLE_METHODS[method](x, y, threshold)
+    return series.iloc[indices].reset_index(drop=True)
+
+# Function to reduce the time series of a pass for a plot of the given width
+# Each column is reduced on its own, so every series keeps its own peaks
+def reduce_time_series(df, columns=TIME_SERIES_COLUMNS, threshold=PLOT_WIDTH_PIXELS, method='lttb'):
+    return {column: downsample_series(df, column, threshold, method) for column in columns if column in df.columns}
@@ -1,23 +1,34 @@
 import os
+import json
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
-from jinja2 import Template
-import urllib.request
-from datetime import datetime
-from PIL import Image
-import folium
-from folium.plugins import HeatMap
+from jinja2 import Environment, FileSystemLoader
 
 from tle_utils import download_tle_if_necessary
+from downsample import reduce_time_series, PLOT_WIDTH_PIXELS
+
+# Series with more points than this are drawn without markers
+MAX_MARKER_POINTS = 500
+
+# Width in pixels the interactive SNR and elevation chart is reduced for
+INTERACTIVE_WIDTH_PIXELS = 1600
+
+# Templates are loaded and compiled once and shared by all HTML generators
+TEMPLATE_DIRECTORY = 'templates'
+TEMPLATE_ENV = Environment(loader=FileSystemLoader(TEMPLATE_DIRECTORY), auto_reload=False)
+
+# Index of the pass folders already included in a gallery page (see generate_images_html)
+GALLERY_INDEX_PATH = os.path.join('images', 'gallery_index.json')
+
+# matplotlib, cartopy and PIL are imported inside the functions that use them,
+# so runs that only write HTML do not pay for loading them
 
 # Helper function to create a thumbnail
 # This function generates a thumbnail of an image if it doesn't already exist.
 def create_thumbnail(image_path, thumb_path, size=(200, 200)):
     if not os.path.exists(thumb_path):  # Only create thumbnail if it doesn't exist
+        from PIL import Image
         try:
             img = Image.open(image_path)
             img.thumbnail(size)
@@ -25,34 +36,91 @@ def create_thumbnail(image_path, thumb_path, size=(200, 200)):
         except Exception as e:
             print(f"Error creating thumbnail for {image_path}: {e}")
 
+# Function to load the gallery index
+# For every pass folder it records the mtimes of its directories and the size and mtime of every gallery image
+def load_gallery_index(path=GALLERY_INDEX_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Error reading gallery index {path}, rebuilding it: {e}")
+        return {}
+
+# Function to save the gallery index
+def save_gallery_index(gallery_index, path=GALLERY_INDEX_PATH):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(gallery_index, file)
+    os.replace(temp_path, path)
+
+# Function to check if a pass folder changed since it was indexed
+# Adding, removing or renaming a file or subfolder updates the mtime of its parent directory;
+# images rewritten in place are found by their size and mtime
+def is_folder_changed(folder_path, entry):
+    for relative_root, mtime in entry['directories'].items():
+        try:
+            if os.stat(os.path.join(folder_path, relative_root)).st_mtime_ns != mtime:
+                return True
+        except OSError:
+            return True
+    for image_path, (size, mtime) in entry['images'].items():
+        try:
+            stat = os.stat(os.path.join(folder_path, image_path))
+        except OSError:
+            return True
+        if stat.st_size != size or stat.st_mtime_ns != mtime:
+            return True
+    return False
+
 # Function to generate HTML for images
 # This function generates an HTML file that contains a gallery of images in a given folder.
-def generate_images_html(folder_name):
-    with open('templates/images_template.html', 'r') as file:
-        images_template_str = file.read()
+# Folders whose directories did not change since the last run (according to gallery_index) are not walked again,
+# and images.html is only rewritten when the gallery images or the template changed.
+def generate_images_html(folder_name, gallery_index=None):
+    save_index = gallery_index is None
+    if save_index:
+        gallery_index = load_gallery_index()
+
+    folder_path = os.path.join('images', folder_name)
+    html_path = os.path.join(folder_path, 'images.html')
+    template_mtime = os.stat(os.path.join(TEMPLATE_DIRECTORY, 'images_template.html')).st_mtime_ns
+    entry = gallery_index.get(folder_name)
+    if entry and entry['template_mtime'] == template_mtime and os.path.exists(html_path) and not is_folder_changed(folder_path, entry):
+        return
 
-    images_template = Template(images_template_str)
+    previous_images = entry['images'] if entry else {}
     subfolders = {}
+    images = {}
+    roots = []
 
     # Walk through the directory structure to find images and generate thumbnails
-    for root, dirs, files in os.walk(os.path.join('images', folder_name)):
-        relative_root = os.path.relpath(root, os.path.join('images', folder_name))
+    for root, dirs, files in os.walk(folder_path):
+        relative_root = os.path.relpath(root, folder_path)
+        roots.append(relative_root)
         subfolder_images = []
 
         for file in files:
             # Exclude specific plots from the gallery
             if file.lower().endswith(('.png', '.jpg', '.jpeg')) and not 'thumb' in file and not any(sub in file for sub in ['SNR_and_Elevation_plot', 'satellite_route', 'polar_plot']):
                 thumb_path=''
-                image_path = os.path.relpath(os.path.join(root, file), os.path.join('images', folder_name))
+                image_path = os.path.relpath(os.path.join(root, file), folder_path)
                 if not 'thumb' in image_path:
                     thumb_path = os.path.join(root, 'thumb_' + file)
                 else:
                     thumb_path = image_path
-                
+
+                # Recreate the thumbnail if the image changed since it was indexed
+                stat = os.stat(os.path.join(root, file))
+                images[image_path] = [stat.st_size, stat.st_mtime_ns]
+                if image_path in previous_images and previous_images[image_path] != images[image_path] and os.path.exists(thumb_path):
+                    os.remove(thumb_path)
+
                 create_thumbnail(os.path.join(root, file), thumb_path)
                 subfolder_images.append({
                     'path': image_path,
-                    'thumb_path': os.path.relpath(thumb_path, os.path.join('images', folder_name)),
+                    'thumb_path': os.path.relpath(thumb_path, folder_path),
                     'name': file
                 })
 
@@ -60,17 +128,35 @@ def generate_images_html(folder_name):
             subfolders[relative_root] = subfolder_images
 
     # Render the HTML content using the template and save it
-    html_content = images_template.render(folder_name=folder_name, subfolders=subfolders)
-    with open(os.path.join('images', folder_name, 'images.html'), 'w') as file:
-        file.write(html_content)
+    if not entry or entry['template_mtime'] != template_mtime or entry['images'] != images or not os.path.exists(html_path):
+        images_template = TEMPLATE_ENV.get_template('images_template.html')
+        html_content = images_template.render(folder_name=folder_name, subfolders=subfolders)
+        with open(html_path, 'w') as file:
+            file.write(html_content)
+
+    # Directory mtimes are taken after the thumbnails and images.html were written
+    gallery_index[folder_name] = {
+        'template_mtime': template_mtime,
+        'images': images,
+        'directories': {relative_root: os.stat(os.path.join(folder_path, relative_root)).st_mtime_ns for relative_root in roots},
+    }
+    if save_index:
+        save_gallery_index(gallery_index)
+
+# Function to get the thumbnail of a plot linked from the summary
+# In lazy mode only thumbnails that already exist are used, so opening the summary does not render every plot
+# exists checks whether a thumbnail exists (render_server.py also looks in its cache directory)
+def summary_thumbnail(plot_path, lazy=False, exists=os.path.exists):
+    thumb_path = plot_path.replace('.png', '_thumb.png')
+    if lazy and not exists(thumb_path):
+        return None
+    return thumb_path
 
 # Function to create summary HTML
 # This function generates an HTML summary file that includes details about each satellite pass.
-def generate_summary_html(df):
-    with open('templates/summary_template.html', 'r') as file:
-        summary_template_str = file.read()
-
-    summary_template = Template(summary_template_str)
+# With lazy=True plots are linked even if they have not been rendered yet (see render_server.py).
+def generate_summary_html(df, lazy=False, exists=os.path.exists):
+    summary_template = TEMPLATE_ENV.get_template('summary_template.html')
     passes = []
 
     # Group the dataframe by folder_name to process each pass separately
@@ -86,6 +172,7 @@ def generate_summary_html(df):
             'decoder': folder_df['decoder'].iloc[0].upper(),
             'snr_elevation_link': None,
             'snr_elevation_thumb': None,
+            'snr_elevation_interactive_link': None,
             'satellite_route_link': None,
             'satellite_route_thumb': None,
             'polar_plot_link': None,
@@ -98,24 +185,28 @@ def generate_summary_html(df):
 
         # Check if specific plots exist and set their links and thumbnails
         snr_elevation_path = os.path.join('images', folder_name, 'SNR_and_Elevation_plot.png')
-        if os.path.exists(snr_elevation_path):
+        if lazy or os.path.exists(snr_elevation_path):
             pass_info['snr_elevation_link'] = snr_elevation_path
-            pass_info['snr_elevation_thumb'] = snr_elevation_path.replace('.png', '_thumb.png')
+            pass_info['snr_elevation_thumb'] = summary_thumbnail(snr_elevation_path, lazy, exists)
+
+        snr_elevation_interactive_path = os.path.join('images', folder_name, 'SNR_and_Elevation.html')
+        if lazy or os.path.exists(snr_elevation_interactive_path):
+            pass_info['snr_elevation_interactive_link'] = snr_elevation_interactive_path
 
         satellite_route_path = os.path.join('images', folder_name, 'satellite_route.png')
-        if os.path.exists(satellite_route_path):
+        if lazy or os.path.exists(satellite_route_path):
             pass_info['satellite_route_link'] = satellite_route_path
-            pass_info['satellite_route_thumb'] = satellite_route_path.replace('.png', '_thumb.png')
+            pass_info['satellite_route_thumb'] = summary_thumbnail(satellite_route_path, lazy, exists)
 
         polar_plot_path = os.path.join('images', folder_name, 'polar_plot.png')
-        if os.path.exists(polar_plot_path):
+        if lazy or os.path.exists(polar_plot_path):
             pass_info['polar_plot_link'] = polar_plot_path
-            pass_info['polar_plot_thumb'] = polar_plot_path.replace('.png', '_thumb.png')
+            pass_info['polar_plot_thumb'] = summary_thumbnail(polar_plot_path, lazy, exists)
 
         inverted_polar_plot_path = os.path.join('images', folder_name, 'polar_plot_inverted.png')
-        if os.path.exists(inverted_polar_plot_path):
+        if lazy or os.path.exists(inverted_polar_plot_path):
             pass_info['inverted_polar_plot_link'] = inverted_polar_plot_path
-            pass_info['inverted_polar_plot_thumb'] = inverted_polar_plot_path.replace('.png', '_thumb.png')
+            pass_info['inverted_polar_plot_thumb'] = summary_thumbnail(inverted_polar_plot_path, lazy, exists)
 
         heatmap_path = os.path.join('images', folder_name, 'satellite_route.html')
         if os.path.exists(heatmap_path):
@@ -131,10 +222,7 @@ def generate_summary_html(df):
 # Function to create visualization HTML
 # This function generates an HTML file that shows visualizations for a given folder.
 def generate_visualization_html(df, folder_name):
-    with open('templates/visualization_template.html', 'r') as file:
-        visualization_template_str = file.read()
-
-    visualization_template = Template(visualization_template_str)
+    visualization_template = TEMPLATE_ENV.get_template('visualization_template.html')
     html_content = visualization_template.render(folder_name=folder_name)
 
     os.makedirs(os.path.join('images', folder_name), exist_ok=True)
@@ -149,19 +237,26 @@ def plot_snr_and_elevation(df, folder_name):
         print(f"No valid data points for {folder_name}. Skipping SNR plot.")
         return
 
+    import matplotlib.pyplot as plt
+
+    # Reduce long passes to about one point per pixel of the output image
+    series = reduce_time_series(df, columns=('SNR', 'Elevation'), threshold=PLOT_WIDTH_PIXELS)
+    snr = series['SNR']
+    elevation = series['Elevation']
+
     fig, ax1 = plt.subplots(figsize=(16, 9))
 
     color = 'tab:blue'
     ax1.set_xlabel('Timestamp')
     ax1.set_ylabel('SNR (dB)', color=color)
-    ax1.plot(df['Timestamp'], df['SNR'].astype(float), marker='o', linestyle='-', color=color)
+    ax1.plot(snr['Timestamp'], snr['SNR'], marker='o' if len(snr) <= MAX_MARKER_POINTS else None, linestyle='-', color=color)
     ax1.tick_params(axis='y', labelcolor=color)
     ax1.tick_params(axis='x', rotation=45)
 
     ax2 = ax1.twinx()
     color = 'tab:green'
     ax2.set_ylabel('Elevation (degrees)', color=color)
-    ax2.plot(df['Timestamp'], df['Elevation'].astype(float), marker='x', linestyle='--', color=color)
+    ax2.plot(elevation['Timestamp'], elevation['Elevation'], marker='x' if len(elevation) <= MAX_MARKER_POINTS else None, linestyle='--', color=color)
     ax2.tick_params(axis='y', labelcolor=color)
 
     fig.tight_layout()
@@ -172,6 +267,29 @@ def plot_snr_and_elevation(df, folder_name):
     plt.close()
     create_thumbnail(os.path.join('images', folder_name, 'SNR_and_Elevation_plot.png'), os.path.join('images', folder_name, 'SNR_and_Elevation_plot_thumb.png'))
 
+# Function to create an interactive SNR and elevation chart
+# The page embeds the downsampled SNR, Peak SNR, BER and elevation; the full data is written next to it as CSV
+def generate_snr_elevation_html(df, folder_name):
+    df = df[df['SNR'].astype(float) != 0]
+    if df.empty:
+        print(f"No valid data points for {folder_name}. Skipping interactive SNR chart.")
+        return
+
+    os.makedirs(os.path.join('images', folder_name), exist_ok=True)
+    columns = [column for column in ['Timestamp', 'SNR', 'Peak_SNR', 'BER', 'Elevation'] if column in df.columns]
+    df[columns].to_csv(os.path.join('images', folder_name, 'SNR_and_Elevation_data.csv'), index=False)
+
+    # Timestamps are passed to the chart as milliseconds since the epoch
+    data = {}
+    for column, series in reduce_time_series(df, threshold=INTERACTIVE_WIDTH_PIXELS).items():
+        milliseconds = (series['Timestamp'] - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+        data[column] = [[int(t), float(value)] for t, value in zip(milliseconds, series[column])]
+
+    snr_elevation_template = TEMPLATE_ENV.get_template('snr_elevation_template.html')
+    html_content = snr_elevation_template.render(folder_name=folder_name, data=json.dumps(data), full_data='SNR_and_Elevation_data.csv', points=len(df))
+    with open(os.path.join('images', folder_name, 'SNR_and_Elevation.html'), 'w') as file:
+        file.write(html_content)
+
 # Function to plot the satellite route on a map
 def plot_satellite_route(df, folder_name):
     df = df[df['SNR'].astype(float) != 0]
@@ -179,6 +297,10 @@ def plot_satellite_route(df, folder_name):
         print(f"No valid data points for {folder_name}. Skipping satellite route plot.")
         return
 
+    import matplotlib.pyplot as plt
+    import cartopy.crs as ccrs
+    import cartopy.feature as cfeature
+
     plt.figure(figsize=(20, 12))
     ax = plt.axes(projection=ccrs.PlateCarree())
     ax.add_feature(cfeature.LAND)
@@ -199,6 +321,9 @@ def plot_satellite_route(df, folder_name):
 
 # Function to plot a polar plot showing azimuth and elevation for a specific pass
 def plot_polar(df, folder_name, pass_timestamp, snr_min, snr_max):
+    import matplotlib.pyplot as plt
+    import matplotlib.cm as cm
+
     fig = plt.figure(figsize=(18, 18))
     ax = fig.add_subplot(111, polar=True)
     
@@ -230,6 +355,9 @@ def plot_polar(df, folder_name, pass_timestamp, snr_min, snr_max):
 # Function to plot an inverted polar plot
 # This shows the azimuth and elevation, but the elevation is inverted for a different perspective
 def plot_polar_map(df, folder_name, pass_timestamp, snr_min, snr_max):
+    import matplotlib.pyplot as plt
+    import matplotlib.cm as cm
+
     fig = plt.figure(figsize=(18, 18))
     ax = fig.add_subplot(111, polar=True)
     
@@ -263,6 +391,9 @@ def plot_polar_map(df, folder_name, pass_timestamp, snr_min, snr_max):
 # Function to plot combined polar plots for all passes for a specific decoder
 # This shows the azimuth and elevation for multiple passes on the same plot
 def plot_polar_all(df, decoder, snr_min, snr_max):
+    import matplotlib.pyplot as plt
+    import matplotlib.cm as cm
+
     fig = plt.figure(figsize=(18, 18))
     ax = fig.add_subplot(111, polar=True)
     
@@ -293,6 +424,9 @@ def plot_polar_all(df, decoder, snr_min, snr_max):
 # Function to plot combined inverted polar plots for all passes for a specific decoder
 # This shows the azimuth and elevation for multiple passes on the same plot, with elevation inverted
 def plot_polar_all_map(df, decoder, snr_min, snr_max):
+    import matplotlib.pyplot as plt
+    import matplotlib.cm as cm
+
     fig = plt.figure(figsize=(18, 18))
     ax = fig.add_subplot(111, polar=True)
     
@@ -322,21 +456,36 @@ def plot_polar_all_map(df, decoder, snr_min, snr_max):
     plt.savefig(filename)
     plt.close()
 
+# Function to load the processed log data
+def load_processed_data(path='final_processed_log_data_enriched.xlsx'):
+    df = pd.read_excel(path)
+    df['satellite'] = df['satellite'].str.replace('-', ' ', 1)
+    return df
+
 # Main function
 # This function orchestrates the entire process: downloading TLE data, processing logs, generating plots, and creating HTML files.
-def main(debug=False):
+# With summary_only=True only summary.html is written, linking the plots that already exist.
+# With interactive=True an interactive SNR and elevation chart is also written for each pass.
+def main(debug=False, summary_only=False, interactive=False):
+    if summary_only:
+        generate_summary_html(load_processed_data())
+        return
+
     download_tle_if_necessary()  # Ensure that TLE data is up to date
 
     # Load the processed log data
-    df = pd.read_excel('final_processed_log_data_enriched.xlsx')
-    df['satellite'] = df['satellite'].str.replace('-', ' ', 1)
+    df = load_processed_data()
+
+    gallery_index = load_gallery_index()
 
     # Process each folder in the data
     for folder_name, folder_df in df.groupby('folder_name'):
         plot_snr_and_elevation(folder_df, folder_name)  # Plot SNR and elevation
+        if interactive:
+            generate_snr_elevation_html(folder_df, folder_name)  # Interactive SNR and elevation chart
         plot_satellite_route(folder_df, folder_name)  # Plot satellite route
         generate_visualization_html(folder_df, folder_name)  # Generate visualization HTML
-        generate_images_html(folder_name)  # Generate images HTML
+        generate_images_html(folder_name, gallery_index)  # Generate images HTML (only for changed folders)
 
         snr_min = folder_df['SNR'].min()
         snr_max = folder_df['SNR'].max()
@@ -358,7 +507,12 @@ def main(debug=False):
         plot_polar_all(decoder_df, decoder, snr_min, snr_max)  # Plot combined polar plot
         plot_polar_all_map(decoder_df, decoder, snr_min, snr_max)  # Plot combined inverted polar plot
 
+    save_gallery_index(gallery_index)
     generate_summary_html(df)  # Generate the summary HTML
 
 if __name__ == '__main__':
-    main(debug=False)
+    parser = argparse.ArgumentParser(description='Generate plots and HTML summary of processed satdump logs.')
+    parser.add_argument('--summary-only', action='store_true', help='only regenerate summary.html, without rendering plots')
+    parser.add_argument('--interactive', action='store_true', help='also write an interactive SNR and elevation chart for each pass')
+    args = parser.parse_args()
+    main(debug=False, summary_only=args.summary_only, interactive=args.interactive)
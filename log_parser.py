@@ -5,14 +5,19 @@ import pandas as pd
 from datetime import datetime
 import glob
 
+from log_reader import is_log_file, iter_log_lines, log_base_name, log_rotation_key
+
 # Constants for directories
 LIVE_OUTPUT_DIRECTORY = "images"
 LOG_DIRECTORY = "logs"
 
 # Function to find all log files in a directory
 def find_log_files(directory='logs'):
-    # Returns a list of paths to log files in the specified directory
-    return [os.path.join(directory, file) for file in os.listdir(directory) if file.endswith('.log')]
+    # Returns a list of paths to log files in the specified directory,
+    # including rotated and compressed (.gz, .bz2, .xz) archives, in time order:
+    # the rotations of each log from the oldest to the live .log
+    files = sorted((file for file in os.listdir(directory) if is_log_file(file)), key=log_rotation_key)
+    return [os.path.join(directory, file) for file in files]
 
 # Function to convert a timestamp string to a datetime object
 def convert_timestamp(timestamp_str):
@@ -67,39 +72,49 @@ def process_log_files(files):
     log_entries = []  # List to hold all log entries
     current_entry = None
     folder_name = None
+    base_name = None
 
     # Iterate through each file in the list
+    # Only lines containing the markers below are decoded, see log_reader.py
     for file in files:
-        with open(file, 'r') as f:
-            for line in f:
-                # AOS and LOS support only live decode
-                # can be changed to (I) Start processing... and (I) Stop processing
-                if '(I) Start processing...' in line:
-                    # Start a new entry when 'AOS!!!!!!!!!!!!!!' is found
-                    if current_entry:
-                        log_entries.append(current_entry)
-                    current_entry = {
-                        'start': None,
-                        'end': None,
-                        'logs': []
-                    }
-                elif 'LOS!!!!!!!!!!!!!!' in line:
-                    # Close the entry when '(I) Stop processing' is found
-                    if current_entry:
-                        current_entry['end'] = convert_timestamp(re.match(r'\[(.*?)\]', line).group(1))
-                        log_entries.append(current_entry)
-                        current_entry = None
-                elif 'Generated folder name' in line:
-                    # Extract the folder name from the line
-                    folder_name = re.search(r'[^/\\]+$', line).group(0).strip()
-                elif current_entry and '(I) Progress' in line:
-                    # Process lines containing progress data
-                    if not current_entry['start']:
-                        current_entry['start'] = convert_timestamp(re.match(r'\[(.*?)\]', line).group(1))
-                    values = extract_values_from_progress_line(line, folder_name)
-                    values['Timestamp'] = convert_timestamp(re.match(r'\[(.*?)\]', line).group(1))
-                    current_entry['logs'].append(values)
-    
+        # The open entry and folder name carry over only between consecutive rotations of the same log,
+        # so a pass split by log rotation stays in one entry
+        if log_base_name(os.path.basename(file)) != base_name:
+            if current_entry:
+                log_entries.append(current_entry)
+            current_entry = None
+            folder_name = None
+            base_name = log_base_name(os.path.basename(file))
+
+        for line in iter_log_lines(file):
+            # AOS and LOS support only live decode
+            # can be changed to (I) Start processing... and (I) Stop processing
+            if '(I) Start processing...' in line:
+                # Start a new entry when 'AOS!!!!!!!!!!!!!!' is found
+                if current_entry:
+                    log_entries.append(current_entry)
+                current_entry = {
+                    'start': None,
+                    'end': None,
+                    'logs': []
+                }
+            elif 'LOS!!!!!!!!!!!!!!' in line:
+                # Close the entry when '(I) Stop processing' is found
+                if current_entry:
+                    current_entry['end'] = convert_timestamp(re.match(r'\[(.*?)\]', line).group(1))
+                    log_entries.append(current_entry)
+                    current_entry = None
+            elif 'Generated folder name' in line:
+                # Extract the folder name from the line
+                folder_name = re.search(r'[^/\\]+$', line).group(0).strip()
+            elif current_entry and '(I) Progress' in line:
+                # Process lines containing progress data
+                if not current_entry['start']:
+                    current_entry['start'] = convert_timestamp(re.match(r'\[(.*?)\]', line).group(1))
+                values = extract_values_from_progress_line(line, folder_name)
+                values['Timestamp'] = convert_timestamp(re.match(r'\[(.*?)\]', line).group(1))
+                current_entry['logs'].append(values)
+
     # Append any remaining current entry to the log entries list
     if current_entry:
         log_entries.append(current_entry)
@@ -180,10 +195,11 @@ def extract_decoder_from_folder_name(folder_name):
 def convert_timestamp_to_datetime(timestamp):
     return datetime.fromtimestamp(timestamp)
 
-# Main function to process log files and generate an Excel file
-def main():
+# Function to parse the logs of one station into a DataFrame
+# log_directory holds the satdump logs, json_directory the products copied from satdump live_output
+def parse_logs(log_directory=LOG_DIRECTORY, json_directory=LIVE_OUTPUT_DIRECTORY):
     # Find all log files in the specified directory
-    log_files = find_log_files(directory=LOG_DIRECTORY)
+    log_files = find_log_files(directory=log_directory)
 
     # Process the log files and extract relevant data
     log_entries = process_log_files(log_files)
@@ -195,7 +211,7 @@ def main():
     merged_log_df = merge_rows(log_df)
 
     # Add data from JSON files to the DataFrame
-    merged_log_df = add_json_data(merged_log_df,json_directory=LIVE_OUTPUT_DIRECTORY)
+    merged_log_df = add_json_data(merged_log_df,json_directory=json_directory)
 
     # Extract decoder information from the folder names
     merged_log_df['decoder'] = merged_log_df['folder_name'].apply(extract_decoder_from_folder_name)
@@ -203,6 +219,12 @@ def main():
     # Filter out rows where the satellite name is 'Unknown'
     merged_log_df = merged_log_df[~merged_log_df['satellite'].str.contains('Unknown')]
 
+    return merged_log_df
+
+# Main function to process log files and generate an Excel file
+def main():
+    merged_log_df = parse_logs(log_directory=LOG_DIRECTORY, json_directory=LIVE_OUTPUT_DIRECTORY)
+
     # Save the processed data to an Excel file
     merged_log_df.to_excel('parsed_log_data.xlsx', index=False)
 
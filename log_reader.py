@@ -0,0 +1,100 @@
+import os
+import re
+import mmap
+import gzip
+import bz2
+import lzma
+
+# Openers for compressed (rotated) log archives, keyed by file extension
+COMPRESSED_OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+# Matches plain and rotated log files, i.e. satdump.log, satdump.log.1, satdump.log.2.gz, satdump.log.gz
+# Case-insensitive like the lookup in COMPRESSED_OPENERS, so satdump.log.GZ is found too
+LOG_FILE_PATTERN = re.compile(r'\.log(?:\.(\d+))?(\.gz|\.bz2|\.xz)?$', re.IGNORECASE)
+
+# Markers of the lines process_log_files cares about; blocks of the log without them are never decoded
+LOG_MARKERS = (
+    b'(I) Progress',
+    b'(I) Start processing...',
+    b'LOS!!!!!!!!!!!!!!',
+    b'Generated folder name',
+)
+
+# Function to check if a file name looks like a (possibly rotated or compressed) log file
+def is_log_file(file_name):
+    return LOG_FILE_PATTERN.search(file_name) is not None
+
+# Function to get the base name of a log file, i.e. satdump.log for satdump.log.2.gz
+def log_base_name(file_name):
+    match = LOG_FILE_PATTERN.search(file_name)
+    return file_name[:match.start()] + '.log'
+
+# Function to get the sort key of a log file
+# Rotations of the same log are ordered oldest first (highest rotation index first, live .log last)
+# An archive without rotation index (satdump.log.gz) goes right before the live .log
+def log_rotation_key(file_name):
+    match = LOG_FILE_PATTERN.search(file_name)
+    rotation = int(match.group(1)) if match.group(1) else 0
+    live = match.group(2) is None
+    return log_base_name(file_name), -rotation, live
+
+# The same markers as text, used to pick the lines out of a chunk that contains at least one of them
+TEXT_MARKERS = tuple(marker.decode('ascii') for marker in LOG_MARKERS)
+
+# Size of the blocks a log is scanned in; a block without any marker is skipped without being decoded
+CHUNK_SIZE = 1 << 20
+
+# Function to get the marker lines of a block of complete lines
+def filter_marker_lines(chunk):
+    # Byte level check first; most blocks of a long log contain no marker at all
+    if not any(chunk.find(marker) != -1 for marker in LOG_MARKERS):
+        return []
+    # str 'in' is much faster than bytes 'in' for short lines, so the block is decoded once and split
+    progress, start, los, folder = TEXT_MARKERS
+    return [line.rstrip('\r') + '\n' for line in chunk.decode('utf-8', errors='replace').split('\n')
+            if progress in line or start in line or los in line or folder in line]
+
+# Function to yield marker lines from a plain log file using mmap
+def iter_plain_log_lines(file_path):
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return  # mmap cannot map empty files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            position = 0
+            while position < size:
+                # Blocks end at a line end, so no line is split between two blocks
+                end = mm.find(b'\n', position + CHUNK_SIZE) if position + CHUNK_SIZE < size else -1
+                if end == -1:
+                    end = size
+                yield from filter_marker_lines(mm[position:end])
+                position = end + 1
+
+# Function to yield marker lines from a compressed log archive without unpacking it to disk
+def iter_compressed_log_lines(file_path, opener):
+    with opener(file_path, 'rb') as f:
+        rest = b''
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                break
+            data = rest + data
+            end = data.rfind(b'\n')
+            if end == -1:
+                rest = data
+                continue
+            rest = data[end + 1:]
+            yield from filter_marker_lines(data[:end])
+        if rest:
+            yield from filter_marker_lines(rest)
+
+# Function to yield the relevant lines of any supported log file
+def iter_log_lines(file_path):
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(file_path)[1].lower())
+    if opener:
+        return iter_compressed_log_lines(file_path, opener)
+    return iter_plain_log_lines(file_path)
@@ -0,0 +1,332 @@
+import os
+import shutil
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+import generate_summary
+
+# Default cache limits
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+DISK_CACHE_BYTES = 512 * 1024 * 1024
+
+# Directory the rendered artifacts are kept in; only files in it count towards the disk limit and are evicted
+CACHE_DIRECTORY = 'render_cache'
+
+# Render functions for the per-pass artifacts
+# Each of them writes its files into images/<folder_name>/ like in generate_summary.main, ArtifactCache then moves them to its cache directory
+def render_snr_and_elevation(df, folder_name):
+    generate_summary.plot_snr_and_elevation(df, folder_name)
+
+def render_snr_elevation_html(df, folder_name):
+    generate_summary.generate_snr_elevation_html(df, folder_name)
+
+def render_satellite_route(df, folder_name):
+    generate_summary.plot_satellite_route(df, folder_name)
+
+def render_polar(df, folder_name):
+    snr_min = df['SNR'].min()
+    snr_max = df['SNR'].max()
+    for pass_timestamp in df['pass_timestamp'].unique():
+        pass_df = df[df['pass_timestamp'] == pass_timestamp]
+        generate_summary.plot_polar(pass_df, folder_name, pass_timestamp, snr_min, snr_max)
+
+def render_polar_map(df, folder_name):
+    snr_min = df['SNR'].min()
+    snr_max = df['SNR'].max()
+    for pass_timestamp in df['pass_timestamp'].unique():
+        pass_df = df[df['pass_timestamp'] == pass_timestamp]
+        generate_summary.plot_polar_map(pass_df, folder_name, pass_timestamp, snr_min, snr_max)
+
+def render_visualization(df, folder_name):
+    generate_summary.generate_visualization_html(df, folder_name)
+
+# Gallery pages get the gallery index loaded once by ArtifactCache; it is saved only when the folder's entry changed
+def render_images(df, folder_name, gallery_index):
+    entry = gallery_index.get(folder_name)
+    generate_summary.generate_images_html(folder_name, gallery_index)
+    if gallery_index.get(folder_name) != entry:
+        generate_summary.save_gallery_index(gallery_index)
+
+# Render groups: name -> (render function, files written by one render)
+RENDER_GROUPS = {
+    'snr_elevation': (render_snr_and_elevation, ('SNR_and_Elevation_plot.png', 'SNR_and_Elevation_plot_thumb.png')),
+    'snr_elevation_interactive': (render_snr_elevation_html, ('SNR_and_Elevation.html', 'SNR_and_Elevation_data.csv')),
+    'satellite_route': (render_satellite_route, ('satellite_route.png', 'satellite_route_thumb.png')),
+    'polar_plot': (render_polar, ('polar_plot.png', 'polar_plot_thumb.png')),
+    'polar_plot_inverted': (render_polar_map, ('polar_plot_inverted.png', 'polar_plot_inverted_thumb.png')),
+    'visualization': (render_visualization, ('visualization.html',)),
+    'images': (render_images, ('images.html',)),
+}
+
+# Groups whose render function checks by itself whether its output is up to date (see generate_images_html)
+# They are rendered on every request with the gallery index of the cache and stay in images/<folder_name>/, outside of the cache
+REFRESHED_GROUPS = {'images'}
+
+# Lookup of the render group for every file name served on demand
+ARTIFACT_GROUPS = {file_name: group for group, (_, file_names) in RENDER_GROUPS.items() for file_name in file_names}
+
+CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.html': 'text/html; charset=utf-8',
+    '.csv': 'text/csv; charset=utf-8',
+}
+
+
+class ArtifactCache:
+    """
+    Size-bounded LRU cache of rendered artifacts, kept both in memory and on disk.
+    Entries are keyed by (folder_name, render group) and hold the bytes of every file of that group.
+    Artifacts already in the images directory (e.g. made by generate_summary.py) are served as they are;
+    rendered ones are moved to the cache directory, the only directory files are evicted from.
+    Concurrent requests for the same entry wait for a single render.
+    """
+
+    def __init__(self, data, images_directory='images', cache_directory=CACHE_DIRECTORY, memory_bytes=MEMORY_CACHE_BYTES, disk_bytes=DISK_CACHE_BYTES):
+        self.data = data
+        self.images_directory = images_directory
+        self.cache_directory = cache_directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()  # key -> {file_name: bytes}
+        self._disk = OrderedDict()  # key -> total size of the files on disk
+        self._inflight = {}  # key -> Future of a render in progress
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()  # matplotlib's pyplot state is not thread-safe
+        self._page_lock = threading.Lock()  # guards the gallery index shared by the gallery pages
+        self.gallery_index = generate_summary.load_gallery_index()
+        self._scan_disk()
+        self._evict_disk()
+
+    def get(self, folder_name, file_name):
+        """
+        Returns the bytes of an artifact, rendering it on first use. Returns None if it cannot be produced.
+        """
+        key = (folder_name, ARTIFACT_GROUPS[file_name])
+        refreshed = key[1] in REFRESHED_GROUPS
+        with self._lock:
+            files = None if refreshed else self._memory.get(key)
+            if files is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                return files.get(file_name)
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            return future.result().get(file_name)
+
+        cached = False
+        try:
+            if refreshed:
+                files = self._render(key)
+            else:
+                files = self._read_files(self._image_paths(key))
+                if len(files) < len(RENDER_GROUPS[key[1]][1]):
+                    cached = True
+                    files = self._read_files(self._paths(key))
+                    if len(files) < len(RENDER_GROUPS[key[1]][1]):
+                        files = self._render(key)
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # Stored before the key leaves _inflight, so its files cannot be evicted in between;
+            # incomplete results (missing data, failed thumbnail) are not kept and are rendered again next time
+            if not refreshed and len(files) == len(RENDER_GROUPS[key[1]][1]):
+                self._store(key, files, cached)
+            del self._inflight[key]
+        future.set_result(files)
+        return files.get(file_name)
+
+    def exists(self, path):
+        """
+        Returns True if the file at a path below the images directory exists there or in the cache directory.
+        """
+        cache_path = os.path.join(self.cache_directory, os.path.relpath(path, self.images_directory))
+        return os.path.exists(path) or os.path.exists(cache_path)
+
+    def _scan_disk(self):
+        # Count the artifacts left in the cache directory by earlier runs, least recently modified first
+        if not os.path.isdir(self.cache_directory):
+            return
+        entries = []
+        for folder_name in os.listdir(self.cache_directory):
+            if not os.path.isdir(os.path.join(self.cache_directory, folder_name)):
+                continue
+            for group in RENDER_GROUPS:
+                key = (folder_name, group)
+                size = 0
+                mtime = None
+                for path in self._paths(key).values():
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    size += stat.st_size
+                    mtime = stat.st_mtime if mtime is None else max(mtime, stat.st_mtime)
+                if mtime is not None:
+                    entries.append((mtime, key, size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+
+    def _evict_disk(self):
+        disk_size = sum(self._disk.values())
+        # The most recently used entry is always kept; entries in _inflight are being read or rendered right now
+        for evicted_key in list(self._disk)[:-1]:
+            if disk_size <= self.disk_bytes:
+                break
+            if evicted_key in self._inflight:
+                continue
+            disk_size -= self._disk.pop(evicted_key)
+            for path in self._paths(evicted_key).values():
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _paths(self, key):
+        # Paths of the files of an entry in the cache directory
+        folder_name, group = key
+        return {file_name: os.path.join(self.cache_directory, folder_name, file_name) for file_name in RENDER_GROUPS[group][1]}
+
+    def _image_paths(self, key):
+        # Paths of the files of an entry in the images directory, where the render functions write them
+        folder_name, group = key
+        return {file_name: os.path.join(self.images_directory, folder_name, file_name) for file_name in RENDER_GROUPS[group][1]}
+
+    def _read_files(self, paths):
+        files = {}
+        for file_name, path in paths.items():
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    files[file_name] = f.read()
+        return files
+
+    def _render(self, key):
+        folder_name, group = key
+        render = RENDER_GROUPS[group][0]
+        image_paths = self._image_paths(key)
+        if group in REFRESHED_GROUPS:
+            with self._page_lock:
+                render(self.data[folder_name], folder_name, self.gallery_index)
+                return self._read_files(image_paths)
+
+        with self._render_lock:
+            existing = {file_name for file_name, path in image_paths.items() if os.path.exists(path)}
+            render(self.data[folder_name], folder_name)
+
+            # Files written by this render are moved to the cache directory, files that were already in images are copied
+            os.makedirs(os.path.join(self.cache_directory, folder_name), exist_ok=True)
+            for file_name, path in self._paths(key).items():
+                if file_name in existing:
+                    shutil.copyfile(image_paths[file_name], path)
+                elif os.path.exists(image_paths[file_name]):
+                    os.replace(image_paths[file_name], path)
+        return self._read_files(self._paths(key))
+
+    def _store(self, key, files, cached):
+        size = sum(len(content) for content in files.values())
+
+        self._memory[key] = files
+        self._memory.move_to_end(key)
+        memory_size = sum(sum(len(content) for content in entry.values()) for entry in self._memory.values())
+        while memory_size > self.memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            memory_size -= sum(len(content) for content in evicted.values())
+
+        # Only files in the cache directory count towards the disk limit
+        if cached:
+            self._disk[key] = size
+            self._disk.move_to_end(key)
+            self._evict_disk()
+
+
+# Request handler serving the summary and rendering artifacts on demand
+# Everything else (satdump products, thumbnails of the gallery) is served as static files
+class RenderRequestHandler(SimpleHTTPRequestHandler):
+    cache = None
+    summary_df = None
+    summary_lock = threading.Lock()
+
+    def do_GET(self):
+        path = unquote(urlparse(self.path).path)
+        if path == '/':
+            self.send_response(302)
+            self.send_header('Location', '/summary.html')
+            self.end_headers()
+            return
+
+        if path == '/summary.html':
+            # Rewritten on every request so that thumbnails of plots rendered in the meantime are shown
+            with self.summary_lock:
+                generate_summary.generate_summary_html(self.summary_df, lazy=True, exists=self.cache.exists)
+                super().do_GET()
+            return
+
+        parts = path.strip('/').split('/')
+        if len(parts) == 3 and parts[0] == 'images' and parts[2] in ARTIFACT_GROUPS and parts[1] in self.cache.data:
+            self.send_artifact(parts[1], parts[2])
+        else:
+            super().do_GET()
+
+    def send_artifact(self, folder_name, file_name):
+        try:
+            content = self.cache.get(folder_name, file_name)
+        except Exception as e:
+            print(f"Error rendering {file_name} for {folder_name}: {e}")
+            self.send_error(500, f"Error rendering {file_name}")
+            return
+        if content is None:
+            self.send_error(404, f"No data to render {file_name}")
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[os.path.splitext(file_name)[1]])
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+# Main function
+# Loads the processed data, writes a summary linking every plot and serves the plots on demand
+def main():
+    parser = argparse.ArgumentParser(description='Serve the summary and render plots on first request.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--memory-cache-mb', type=int, default=MEMORY_CACHE_BYTES // (1024 * 1024))
+    parser.add_argument('--disk-cache-mb', type=int, default=DISK_CACHE_BYTES // (1024 * 1024))
+    args = parser.parse_args()
+
+    import matplotlib
+    matplotlib.use('Agg')  # Plots are rendered from server threads, never shown
+
+    df = generate_summary.load_processed_data()
+    data = {folder_name: folder_df for folder_name, folder_df in df.groupby('folder_name')}
+
+    RenderRequestHandler.summary_df = df
+    RenderRequestHandler.cache = ArtifactCache(
+        data,
+        memory_bytes=args.memory_cache_mb * 1024 * 1024,
+        disk_bytes=args.disk_cache_mb * 1024 * 1024,
+    )
+    generate_summary.generate_summary_html(df, lazy=True, exists=RenderRequestHandler.cache.exists)
+    server = ThreadingHTTPServer((args.host, args.port), RenderRequestHandler)
+    print(f"Serving summary on http://{args.host}:{args.port}/summary.html")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
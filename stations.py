@@ -0,0 +1,152 @@
+import os
+import json
+import pandas as pd
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import add_azel
+import log_parser
+from generate_summary import TEMPLATE_ENV
+
+# Station registry file
+# [{"name": "aveiro", "lat": 40.70, "lon": -8.35, "elevation": 300, "logs": "logs", "images": "images"}, ...]
+STATIONS_FILE = 'stations.json'
+
+# Passes of the same satellite starting within this window at different stations are treated as one pass
+PASS_MATCH_WINDOW = timedelta(minutes=15)
+
+# Function to load the station registry
+# Without a registry file the single station configured in add_azel.py and log_parser.py is used
+def load_stations(path=STATIONS_FILE):
+    if not os.path.exists(path):
+        return [{
+            'name': 'default',
+            'lat': add_azel.OBSERVER_LAT,
+            'lon': add_azel.OBSERVER_LON,
+            'elevation': add_azel.OBSERVER_ELEVATION,
+            'logs': log_parser.LOG_DIRECTORY,
+            'images': log_parser.LIVE_OUTPUT_DIRECTORY,
+        }]
+
+    with open(path, 'r') as file:
+        stations = json.load(file)
+
+    if not stations:
+        raise ValueError(f"No stations defined in {path}")
+    names = [station['name'] for station in stations]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Station names in {path} must be unique: {names}")
+    return stations
+
+# Function to parse the logs of a station
+def parse_station_logs(station):
+    return log_parser.parse_logs(log_directory=station['logs'], json_directory=station['images'])
+
+# Function to add azimuth, elevation and sub-satellite point to the parsed logs of a station
+# positions are the geocentric positions shared between all stations (see add_azel.calculate_positions)
+def process_station(station, df, satellites, positions):
+    df = add_azel.add_azimuth_elevation_distance(df, satellites, station['lat'], station['lon'], station['elevation'], positions=positions)
+    df['station'] = station['name']
+
+    df.to_excel(f"final_processed_log_data_enriched_{station['name']}.xlsx", index=False)
+    return df
+
+# Function to process all stations concurrently
+# Satellite positions are computed once for the timestamps of all stations, between parsing and the per-station step
+def process_stations(stations, satellites):
+    with ThreadPoolExecutor(max_workers=len(stations)) as executor:
+        station_dfs = list(executor.map(parse_station_logs, stations))
+        positions = add_azel.calculate_positions(station_dfs, satellites)
+        futures = [executor.submit(process_station, station, df, satellites, positions) for station, df in zip(stations, station_dfs)]
+        return [future.result() for future in futures]
+
+# Function to summarize every pass of every station
+def summarize_station_passes(df):
+    df = df.assign(SNR=df['SNR'].astype(float), Elevation=df['Elevation'].astype(float))
+    passes = df.groupby(['station', 'folder_name']).agg(
+        satellite=('satellite', 'first'),
+        decoder=('decoder', 'first'),
+        pass_start=('Timestamp', 'min'),
+        pass_end=('Timestamp', 'max'),
+        max_snr=('SNR', 'max'),
+        mean_snr=('SNR', 'mean'),
+        max_elevation=('Elevation', 'max'),
+    ).reset_index()
+    return passes.sort_values(['satellite', 'pass_start']).reset_index(drop=True)
+
+# Function to assign a common pass_id to passes of the same satellite seen by different stations
+def match_passes(passes, window=PASS_MATCH_WINDOW):
+    pass_ids = []
+    pass_id = -1
+    current_satellite = None
+    current_end = None
+
+    # passes are sorted by satellite and pass start
+    for _, row in passes.iterrows():
+        if row['satellite'] != current_satellite or row['pass_start'] > current_end + window:
+            pass_id += 1
+            current_satellite = row['satellite']
+            current_end = row['pass_end']
+        else:
+            current_end = max(current_end, row['pass_end'])
+        pass_ids.append(pass_id)
+
+    return passes.assign(pass_id=pass_ids)
+
+# Function to build the cross-station comparison table (one row per pass, SNR columns per station)
+def compare_stations(df, station_names):
+    passes = match_passes(summarize_station_passes(df))
+
+    comparison = passes.groupby('pass_id').agg(
+        satellite=('satellite', 'first'),
+        decoder=('decoder', 'first'),
+        pass_start=('pass_start', 'min'),
+        pass_end=('pass_end', 'max'),
+    )
+    for column in ['max_snr', 'mean_snr', 'max_elevation']:
+        per_station = passes.pivot_table(index='pass_id', columns='station', values=column, aggfunc='max')
+        per_station = per_station.reindex(columns=station_names)
+        per_station.columns = [f'{column}_{station}' for station in per_station.columns]
+        comparison = comparison.join(per_station)
+
+    best_snr = passes.sort_values('max_snr', ascending=False).drop_duplicates('pass_id')[['pass_id', 'station']]
+    comparison = comparison.join(best_snr.set_index('pass_id').rename(columns={'station': 'best_station'}))
+    comparison['stations'] = passes.groupby('pass_id')['station'].nunique()
+    return comparison.reset_index(drop=True)
+
+# Function to create the cross-station summary HTML
+def generate_stations_summary_html(comparison, station_names, output_path='stations_summary.html'):
+    passes = []
+    for _, row in comparison.iterrows():
+        passes.append({
+            'satellite': row['satellite'],
+            'decoder': str(row['decoder']).upper(),
+            'pass_start': row['pass_start'].strftime('%Y-%m-%d<BR>%H:%M:%S'),
+            'pass_end': row['pass_end'].strftime('%H:%M:%S'),
+            'best_station': row['best_station'],
+            'stations': [{
+                'max_snr': None if pd.isna(row[f'max_snr_{name}']) else round(row[f'max_snr_{name}'], 2),
+                'mean_snr': None if pd.isna(row[f'mean_snr_{name}']) else round(row[f'mean_snr_{name}'], 2),
+                'max_elevation': None if pd.isna(row[f'max_elevation_{name}']) else round(row[f'max_elevation_{name}'], 2),
+            } for name in station_names],
+        })
+
+    html_content = TEMPLATE_ENV.get_template('stations_summary_template.html').render(station_names=station_names, passes=passes)
+    with open(output_path, 'w') as file:
+        file.write(html_content)
+
+# Main function
+# Processes all registered stations with one shared TLE archive and writes the cross-station summary
+def main():
+    stations = load_stations()
+    station_names = [station['name'] for station in stations]
+
+    station_dfs = process_stations(stations, add_azel.get_satellites())
+    df = pd.concat(station_dfs, ignore_index=True)
+
+    comparison = compare_stations(df, station_names)
+    comparison.to_excel('stations_summary.xlsx', index=False)
+    generate_stations_summary_html(comparison, station_names)
+
+if __name__ == '__main__':
+    main()
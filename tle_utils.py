@@ -6,7 +6,6 @@ Created on Sat Aug  3 17:25:33 2024
 """
 
 import os
-import requests
 from datetime import datetime
 
 # Define the URL for downloading TLE data
@@ -38,6 +37,8 @@ def download_tle():
     """
     Downloads the TLE data from the specified URL and saves it to the TLE_FILE_PATH.
     """
+    import requests
+
     try:
         response = requests.get(TLE_URL)
         response.raise_for_status()